@@ -1,9 +1,14 @@
 # __init__.py
+from .cache import result_cache  # noqa: F401
 from .input_output import input_data  # noqa: F401
 from .input_output import output_data  # noqa: F401
 from .numerical import aucofu  # noqa: F401
+from .numerical import aucofu_norm  # noqa: F401
+from .numerical import check_norm  # noqa: F401
 from .numerical import calc_auto  # noqa: F401
 from .numerical import DFT  # noqa: F401
+from .numerical import prepare_time_grid  # noqa: F401
 from .statistical import check_significance  # noqa: F401
+from .statistical import variance  # noqa: F401
 from .statistical import euclidean_distance  # noqa: F401
 from .statistical import correlation_matrix  # noqa: F401
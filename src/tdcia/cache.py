@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import pickle
+
+# increase whenever the cached results change, to invalidate old entries
+cache_version = 1
+
+
+def hash_file(filename, blocksize=2**20):
+    """Computes the hash of the content of a file.
+
+    Args:
+        filename (string): The path to the file.
+        blocksize (integer): The number of bytes read at once.
+
+    Returns:
+        string: The hexadecimal SHA-256 hash of the file content."""
+    myhash = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            myhash.update(block)
+    return myhash.hexdigest()
+
+
+class result_cache:
+    """Data object that stores the results of the compute stages on disk.
+    Results are identified by the name of the function and a key, that
+    should contain the hash of the input file and all parameters that the
+    result depends on. If the cache grows beyond the maximum size, the
+    least recently used results are removed; the order of use is kept in an
+    index file, so that it does not depend on the file timestamps.
+
+    Args:
+        cachedir (string): The directory containing the cached results. If\
+        None, results are not cached.
+        maxsize (integer): The maximum size of the cache in bytes.
+
+    """
+
+    def __init__(self, cachedir=None, maxsize=2**30):
+        self.dir = cachedir
+        self.maxsize = maxsize
+        self.index = {}
+        if self.dir is not None:
+            os.makedirs(self.dir, exist_ok=True)
+            self.indexfile = os.path.join(self.dir, 'index.json')
+            if os.path.isfile(self.indexfile):
+                with open(self.indexfile) as f:
+                    self.index = json.load(f)
+        self.counter = max(self.index.values(), default=0)
+
+    def get_path(self, func, key):
+        """Method that determines the file name of a cached result.
+
+        Args:
+            func (function): The function that computes the result.
+            key (tuple): The input file hash and parameters of the result.
+
+        Returns:
+            string: The path to the cached result."""
+        name = repr((cache_version, func.__name__, key)).encode()
+        return os.path.join(self.dir,
+                            '{}.pkl'.format(hashlib.sha256(name).hexdigest()))
+
+    def call(self, func, key, *args, **kwargs):
+        """Returns the cached result of a function call, or calls the function\
+        and stores the result if it is not in the cache.
+
+        Args:
+            func (function): The function that computes the result.
+            key (tuple): The input file hash and parameters of the result.
+            args: The arguments passed to the function.
+            kwargs: The keyword arguments passed to the function.
+
+        Returns:
+            The result of the function call."""
+        if self.dir is None:
+            return func(*args, **kwargs)
+        path = self.get_path(func, key)
+        if os.path.isfile(path):
+            print('Reading cached result of {}'.format(func.__name__))
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            self.mark_used(path)
+            return result
+        result = func(*args, **kwargs)
+        # skip arrays that are known to be too large before writing them
+        if getattr(result, 'nbytes', 0) > self.maxsize:
+            print('Result of {} is too large to be cached'.format(
+                  func.__name__))
+            return result
+        # write to a temporary file first so that no partial results are read
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if os.path.getsize(path + '.tmp') > self.maxsize:
+            print('Result of {} is too large to be cached'.format(
+                  func.__name__))
+            os.remove(path + '.tmp')
+            return result
+        os.replace(path + '.tmp', path)
+        self.mark_used(path)
+        self.evict()
+        return result
+
+    def mark_used(self, path):
+        """Method that marks a cached result as most recently used.
+
+        Args:
+            path (string): The path to the cached result."""
+        self.counter += 1
+        self.index[os.path.basename(path)] = self.counter
+        self.write_index()
+
+    def write_index(self):
+        """Method that writes the order of use of the cached results."""
+        with open(self.indexfile + '.tmp', 'w') as f:
+            json.dump(self.index, f)
+        os.replace(self.indexfile + '.tmp', self.indexfile)
+
+    def evict(self):
+        """Method that removes the least recently used results until the\
+        cache is smaller than the maximum size."""
+        entries = []
+        for entry in os.scandir(self.dir):
+            if entry.name.endswith('.pkl.tmp'):
+                # left over from an interrupted write
+                os.remove(entry.path)
+            elif entry.name.endswith('.pkl'):
+                # results missing from the index are removed first
+                entries.append((self.index.get(entry.name, 0), entry.name,
+                                entry.stat().st_size))
+        entries.sort()
+        size = sum(entry[2] for entry in entries)
+        for counter, name, entrysize in entries:
+            if size <= self.maxsize:
+                break
+            os.remove(os.path.join(self.dir, name))
+            self.index.pop(name, None)
+            size -= entrysize
+        # forget about results that were removed by other means
+        names = set(entry[1] for entry in entries)
+        self.index = {name: counter for name, counter in self.index.items()
+                      if name in names}
+        self.write_index()
@@ -68,7 +68,8 @@ class output_data:
         indices (integer list): The column indices that remain if \
         insignificant entries were skipped.
         option (string): The option that handles the output processing -\
-        choose from: `expecval`, `MOpop`, `transdipmom`, `efield`, `aucofu`.
+        choose from: `expecval`, `MOpop`, `transdipmom`, `efield`, `aucofu`,\
+        `norm`.
         data2 (numpy array/pandas dataframe): The additional data, if two sets\
         of data are processed for that specific output option.
         """
@@ -82,7 +83,8 @@ class output_data:
         # case switch option in python using a dictionary and function names
         self.objects = {'expecval': self.plot0, 'MOpop': self.plot1,
                         'transdipmom': self.plot2,
-                        'efield': self.plot3, 'aucofu': self.plot4}
+                        'efield': self.plot3, 'aucofu': self.plot4,
+                        'norm': self.plot6}
         self.case = self.objects.get(self.option, self.plot5)
         # call the selected function
         self.case()
@@ -200,6 +202,30 @@ class output_data:
         plt.savefig('{}/Figure_autocorrelation_function_FT.pdf'.format(
             self.outdir), dpi=300, bbox_inches='tight')
 
+    def plot6(self):
+        """Norm output method.
+        Generates data files and plot - the norm of the wave function and the\
+        states with the largest population are saved to the corresponding\
+        files."""
+        print('Writing norm and largest populations')
+        states, pops = self.data2
+        header = 'time (fs)   norm'
+        for i in range(len(states)):
+            header += '   state{}   pop{}'.format(i + 1, i + 1)
+        columns = [np.real(self.data[0]), np.real(self.data[1])]
+        for i in range(len(states)):
+            columns += [states[i], pops[i]]
+        np.savetxt('{}/norm.t'.format(self.outdir), np.column_stack(columns),
+                   fmt=['%.10f', '%.15f'] + ['%d', '%.15f'] * len(states),
+                   newline='\n', header=header)
+        print('Plotting norm')
+        fig, ax = plt.subplots(figsize=(8, 5))
+        ax.plot(np.real(self.data[0]), np.real(self.data[1]) - 1.0,
+                label="norm - 1")
+        self.plotparams(ax, "time (fs)", "deviation of norm")
+        plt.savefig('{}/Figure_norm.pdf'.format(self.outdir),
+                    dpi=300, bbox_inches='tight')
+
     def plot5(self):
         """Default output method - no output."""
         print('Error: Method not found')
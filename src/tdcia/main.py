@@ -8,6 +8,7 @@ import numpy as np
 import input_output as io
 import statistical as sl
 import numerical as nl
+import cache as ca
 # import cProfile
 
 
@@ -29,7 +30,42 @@ def get_run_type(name):
     return case
 
 
-def run_expec(data, threshd, dir_out):
+def read_data(myobjin):
+    """Reads in the data; duplicated time steps of restarted runs are\
+    removed from time series, so that only the cleaned data is cached.
+
+    Args:
+        myobjin (input_data): The input data object.
+
+    Returns:
+        numpy array/pandas dataframe: The data."""
+    data = myobjin.read_in()
+    if myobjin.name in {'efield.t', 'nstate_i.t'}:
+        data = nl.drop_restart_rows(data)
+    return data
+
+
+def get_significant(data, threshd, cache, key):
+    """Determines the significant columns of the data; the variances are\
+    cached separately so that they are reused if only the threshold changes.
+
+    Args:
+        data (numpy array/pandas dataframe): The data to process.
+        threshd (float): The variance threshold below which data is considered\
+        as constant and not included in the output.
+        cache (result_cache): The cache for the results of the compute stages.
+        key (tuple): The input file hash, to identify cached results.
+
+    Returns:
+        numpy array/pandas dataframe, integer list/string list:\
+        The data object without insignificant columns and the indices of the\
+        remaining columns."""
+    myvar = cache.call(sl.variance, key, data)
+    return cache.call(sl.check_significance, key + (threshd,),
+                      data, threshd, myvar)
+
+
+def run_expec(data, threshd, dir_out, cache, key, nworkers, normtol):
     """Handles the call to read and plot expect.t data;
     only plots relevant values (values that are not constant).
 
@@ -38,14 +74,18 @@ def run_expec(data, threshd, dir_out):
         threshd (float): The variance threshold below which data is considered\
         as constant and not included in the output.
         dir_out (string): Output file directory.
+        cache (result_cache): The cache for the results of the compute stages.
+        key (tuple): The input file hash, to identify cached results.
+        nworkers (integer): The number of threads.
+        normtol (float): The tolerated deviation of the norm from 1.
         """
-    data, indices = sl.check_significance(data, threshd)
+    data, indices = get_significant(data, threshd, cache, key)
     # cProfile.runctx('sl.check_significance(data, threshd)', globals(),
     #                  locals())
     io.output_data(data, indices, dir_out, option='expecval')
 
 
-def run_npop(data, threshd, dir_out):
+def run_npop(data, threshd, dir_out, cache, key, nworkers, normtol):
     """Handles the call to read npop.t data; discards irrelevant
     columns (columns that remain constant); constructs the correlation
     matrix and prints/plots the result.
@@ -55,14 +95,18 @@ def run_npop(data, threshd, dir_out):
         threshd (float): The variance threshold below which data is considered\
         as constant and not included in the output.
         dir_out (string): Output file directory.
+        cache (result_cache): The cache for the results of the compute stages.
+        key (tuple): The input file hash, to identify cached results.
+        nworkers (integer): The number of threads.
+        normtol (float): The tolerated deviation of the norm from 1.
         """
-    data, indices = sl.check_significance(data, threshd)
-    corrmat = sl.correlation_matrix(data)
+    data, indices = get_significant(data, threshd, cache, key)
+    corrmat = cache.call(sl.correlation_matrix, key + (threshd,), data)
     io.output_data(data, indices, dir_out,
                    option='MOpop', data2=corrmat)
 
 
-def run_table(data, threshd, dir_out):
+def run_table(data, threshd, dir_out, cache, key, nworkers, normtol):
     """Handles the call to read table.dat data;
     calculates Euclidean distance (L2 norm) of
     the vectors in the table.
@@ -72,16 +116,21 @@ def run_table(data, threshd, dir_out):
         threshd (float): The variance threshold below which data is considered\
         as constant and not included in the output.
         dir_out (string): Output file directory.
+        cache (result_cache): The cache for the results of the compute stages.
+        key (tuple): The input file hash, to identify cached results.
+        nworkers (integer): The number of threads.
+        normtol (float): The tolerated deviation of the norm from 1.
         """
     # no need for the first two columns, and replace the NaNs by zero
     data = np.delete(data, [0, 1], axis=0)
     data = np.nan_to_num(data)
-    l2norm = sl.euclidean_distance([0, 2, 4], [1, 3, 5], data)
+    l2norm = cache.call(sl.euclidean_distance, key,
+                        [0, 2, 4], [1, 3, 5], data)
     indices = []
     io.output_data(l2norm, indices, dir_out, option='transdipmom')
 
 
-def run_efield(data, threshd, dir_out):
+def run_efield(data, threshd, dir_out, cache, key, nworkers, normtol):
     """Handles the call to read efield.t data; Fourier-transforms
     relevant values (values that are not constant) and plots the
     resulting spectrum.
@@ -90,37 +139,61 @@ def run_efield(data, threshd, dir_out):
         data (numpy array): The data to process.
         threshd (float): The variance threshold below which data is considered\
         as constant and not included in the output.
-        dir_out (string): Output file directory."""
-    data, indices = sl.check_significance(data, threshd)
+        dir_out (string): Output file directory.
+        cache (result_cache): The cache for the results of the compute stages.
+        key (tuple): The input file hash, to identify cached results.
+        nworkers (integer): The number of threads.
+        normtol (float): The tolerated deviation of the norm from 1."""
+    # not cached, as this is cheap and returns the input for uniform data
+    data = nl.prepare_time_grid(data)
+    data, indices = get_significant(data, threshd, cache, key)
     # todo: how to handle more than one significant column
-    data_w, data_s = nl.DFT(data, realdft=True)
+    data_w, data_s = cache.call(nl.DFT, key + (threshd, True),
+                                data, realdft=True)
     io.output_data(np.stack((data_w, data_s)), indices, dir_out,
                    option='efield')
 
 
-def run_nstate(data, threshd, dir_out):
+def run_nstate(data, threshd, dir_out, cache, key, nworkers, normtol):
     """Handles the call to read nstate_i.t data; calculates, prints
     and plots the autocorrelation function; Fourier-transforms and
-    plots the autocorrelation function.
+    plots the autocorrelation function; checks the norm and prints the
+    states with the largest population.
 
     Args:
         data (numpy array): The data to process.
         threshd (float): The variance threshold below which data is considered\
         as constant and not included in the output.
         dir_out (string): Output file directory.
+        cache (result_cache): The cache for the results of the compute stages.
+        key (tuple): The input file hash, to identify cached results.
+        nworkers (integer): The number of threads.
+        normtol (float): The tolerated deviation of the norm from 1.
         """
-    time, aucofu = nl.aucofu(data)
-    data_w, data_s = nl.DFT(np.stack((time, aucofu)), realdft=False)
+    # the norm is computed on the original time steps, as the interpolated
+    # coefficients are not normalized; the result does not depend on the
+    # number of threads
+    time, aucofu, norm, states, pops = cache.call(nl.aucofu_norm, key, data,
+                                                  nworkers=nworkers)
+    nl.check_norm(time, norm, normtol)
     indices = []
+    io.output_data(np.stack((time, norm)), indices, dir_out, option='norm',
+                   data2=(states, pops))
+    # the overlap is linear in the coefficients, so resampling the
+    # autocorrelation function is the same as resampling the coefficients
+    time, aucofu = nl.prepare_time_grid(np.stack((time, aucofu)))
+    data_w, data_s = cache.call(nl.DFT, key + (False,),
+                                np.stack((time, aucofu)), realdft=False)
     io.output_data(np.stack((time, aucofu)), indices,
                    dir_out, option='aucofu', data2=np.stack((data_w, data_s)))
 
 
-def run_abort(data, threshd):
+def run_abort(data, threshd, dir_out, cache, key, nworkers, normtol):
     exit("Error: This type of analysis is not implemented")
 
 
-def main(data_in, dir_in, dir_out, threshd=1.E-5):
+def main(data_in, dir_in, dir_out, threshd=1.E-5, cachedir=None,
+         maxsize=2**30, nworkers=1, normtol=1.E-6):
     """Main function call if analysis package is to be run as a script.
 
     Args:
@@ -128,11 +201,22 @@ def main(data_in, dir_in, dir_out, threshd=1.E-5):
         dir_in (string): Input file directory.
         dir_out (string): Output file directory.
         threshd (float): The variance threshold below which data is considered\
-        as constant and not included in the output."""
+        as constant and not included in the output.
+        cachedir (string): Directory in which the results of the compute\
+        stages are cached. If None, no results are cached.
+        maxsize (integer): The maximum size of the cache in bytes.
+        nworkers (integer): The number of threads used to compute the\
+        autocorrelation function.
+        normtol (float): The deviation of the norm of the wave function from\
+        1 above which a warning is printed."""
     myobjin = io.input_data(data_in, dir_in)
-    data = myobjin.read_in()
+    cache = ca.result_cache(cachedir, maxsize)
+    key = ()
+    if cachedir is not None:
+        key = (data_in, ca.hash_file('{}{}'.format(dir_in, data_in)))
+    data = cache.call(read_data, key, myobjin)
     runtype = get_run_type(data_in)
-    runtype(data, threshd, dir_out)
+    runtype(data, threshd, dir_out, cache, key, nworkers, normtol)
 
 
 if __name__ == "__main__":
@@ -1,13 +1,155 @@
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
 
-def aucofu(wavef):
+def drop_restart_rows(data, tol=1.E-8):
+    """Function to remove the rows that were written twice when a
+    propagation was restarted. Time steps that are later overwritten by a
+    restarted run are discarded, so that the most recent data is kept.
+
+    Args:
+        data (numpy array, real or complex): The data with time data in the\
+        first row.
+        tol (float): Time steps closer than this tolerance are considered\
+        identical.
+
+    Returns:
+        numpy array: The data with strictly increasing time steps.
+    """
+    time = np.real(data[0])
+    # smallest time that is written at any later point in the file
+    later_min = np.minimum.accumulate(time[::-1])[::-1]
+    later_min = np.append(later_min[1:], np.inf)
+    keep = time < later_min - tol
+    if not keep.all():
+        print('Dropping {} duplicated time steps'.format(np.sum(~keep)))
+        data = data[:, keep]
+    return data
+
+
+def check_time_grid(time, rtol=1.E-6):
+    """Function to determine if the time steps are equally spaced.
+
+    Args:
+        time (numpy array): The time data.
+        rtol (float): The relative tolerance of the time step.
+
+    Returns:
+        bool: True if the time grid is uniform."""
+    dt = np.diff(time)
+    if len(dt) == 0:
+        return True
+    return bool(np.all(np.abs(dt - dt[0]) <= rtol * np.abs(dt[0])))
+
+
+def resample(data):
+    """Function to linearly interpolate the data onto a uniform time grid,
+    with the median time step of the original grid.
+
+    Args:
+        data (numpy array, real or complex): The data with time data in the\
+        first row and strictly increasing time steps.
+
+    Returns:
+        numpy array, real or complex: The data on the uniform time grid.
+    """
+    time = np.real(data[0])
+    dt = np.median(np.diff(time))
+    # the uniform grid must not extend beyond the last time step
+    ntime = int(np.floor((time[-1] - time[0]) / dt + 1.E-8)) + 1
+    newtime = time[0] + dt * np.arange(ntime)
+    # interpolate all rows at once using the same weights
+    idx = np.searchsorted(time, newtime, side='right') - 1
+    idx = np.clip(idx, 0, len(time) - 2)
+    weight = (newtime - time[idx]) / (time[idx + 1] - time[idx])
+    newdata = data[:, idx] * (1 - weight) + data[:, idx + 1] * weight
+    newdata[0] = newtime
+    return newdata
+
+
+def prepare_time_grid(data):
+    """Function to validate the time data before computing correlation\
+    functions or Fourier transforms. Duplicated time steps from restarted\
+    runs are dropped and the data is resampled if the time grid is not\
+    uniform.
+
+    Args:
+        data (numpy array, real or complex): The data with time data in the\
+        first row.
+
+    Returns:
+        numpy array, real or complex: The data on a uniform time grid.
+    """
+    data = drop_restart_rows(data)
+    if not check_time_grid(np.real(data[0])):
+        print('Time grid is not uniform - resampling')
+        data = resample(data)
+    return data
+
+
+def reduce_blocks(func, nrows, nworkers=1, blocksize=1024, combine=np.add):
+    """Function to apply a function to blocks of rows on a thread pool and\
+    combine the partial results. The block boundaries do not depend on the\
+    number of workers and the partial results are always combined in the same\
+    order, so that the result is identical for any number of workers.
+
+    Args:
+        func (function): The function that computes the partial result for\
+        the rows from start to stop.
+        nrows (integer): The total number of rows.
+        nworkers (integer): The number of threads.
+        blocksize (integer): The number of rows in each block.
+        combine (function): The function that combines two partial results.
+
+    Returns:
+        numpy array: The combined partial results.
+    """
+    # without rows, a single empty block is computed
+    starts = range(0, max(nrows, 1), blocksize)
+
+    def myblock(start):
+        return func(start, min(start + blocksize, nrows))
+
+    def mycombine(partial):
+        # the partial results arrive in the order of the blocks and are
+        # combined immediately, so that they are not all kept in memory
+        result = next(partial)
+        for part in partial:
+            result = combine(result, part)
+        return result
+
+    if nworkers > 1:
+        # numpy releases the GIL in the vector operations
+        with ThreadPoolExecutor(max_workers=nworkers) as pool:
+            return mycombine(pool.map(myblock, starts))
+    return mycombine(map(myblock, starts))
+
+
+def complex_block(wavef, start, stop):
+    """Helper function to convert a block of coefficients to a complex array.
+
+    Args:
+        wavef (numpy array, real): The real and imaginary parts of the\
+        coefficients in alternating rows, without the time data.
+        start (integer): The first coefficient of the block.
+        stop (integer): The coefficient after the last one of the block.
+
+    Returns:
+        numpy array, complex: The coefficients of the block over time."""
+    realpart = wavef[2 * start:2 * stop:2]
+    imagpart = wavef[2 * start + 1:2 * stop:2]
+    return realpart + 1j * imagpart
+
+
+def aucofu(wavef, nworkers=1, blocksize=1024):
     """Function to compute the autocorrelation function from the
     given vectors (with respect to the first time step).
 
     Args:
         wavef (numpy array, complex): The wave function\
         over time.
+        nworkers (integer): The number of threads.
+        blocksize (integer): The number of coefficients processed at once.
 
     Returns:
         numpy array, complex: The autocorrelation\
@@ -16,31 +158,139 @@ def aucofu(wavef):
     """
     # store the time column in a vector and drop from array
     time = wavef[0]
-    wavef = np.delete(wavef, [0], axis=0)
-    # convert to complex array
-    realpart = wavef[0::2]
-    imagpart = wavef[1::2]
-    wavefc = realpart + 1j * imagpart
-    # Now construct overlap between first vector and all others
-    aucofu = calc_auto(wavefc)
+    wavef = wavef[1:]
+
+    def myblock(start, stop):
+        # Now construct overlap between first vector and all others
+        return overlap(complex_block(wavef, start, stop))
+
+    aucofu = reduce_blocks(myblock, len(wavef[0::2]), nworkers, blocksize)
     return time, aucofu
 
 
-def calc_auto(wavef):
+def aucofu_norm(wavef, nworkers=1, blocksize=1024, nlargest=3):
+    """Function to compute the autocorrelation function, the norm and the\
+    states with the largest population in one pass over the coefficients.
+
+    Args:
+        wavef (numpy array, complex): The wave function\
+        over time.
+        nworkers (integer): The number of threads.
+        blocksize (integer): The number of coefficients processed at once.
+        nlargest (integer): The number of states with the largest population\
+        to be determined.
+
+    Returns:
+        numpy array, real; numpy array, complex; numpy array, real;\
+        numpy array, integer; numpy array, real: The time, the\
+        autocorrelation function, the norm <Psi(t)|Psi(t)>, and the states\
+        (counting from 1) with the largest population and their population\
+        for each time step.
+    """
+    time = wavef[0]
+    wavef = wavef[1:]
+
+    def myblock(start, stop):
+        wavefc = complex_block(wavef, start, stop)
+        pop = np.abs(wavefc)**2
+        states, pops = largest_states(pop, nlargest)
+        return (overlap(wavefc), np.sum(pop, axis=0), states + start, pops)
+
+    def mycombine(res1, res2):
+        states, pops = sort_states(np.concatenate((res1[2], res2[2])),
+                                   np.concatenate((res1[3], res2[3])),
+                                   nlargest)
+        return (res1[0] + res2[0], res1[1] + res2[1], states, pops)
+
+    aucofu, norm, states, pops = reduce_blocks(myblock, len(wavef[0::2]),
+                                               nworkers, blocksize,
+                                               mycombine)
+    return time, aucofu, norm, states + 1, pops
+
+
+def largest_states(pop, nlargest):
+    """Helper function to find the states with the largest population.
+
+    Args:
+        pop (numpy array, real): The population of the states over time.
+        nlargest (integer): The number of states to be determined.
+
+    Returns:
+        numpy array, integer; numpy array, real: The indices of the states\
+        with the largest population and their population for each time step.
+    """
+    # a stable sort keeps the order of the indices for equal population
+    states = np.argsort(-pop, axis=0, kind='stable')[:nlargest]
+    return states, np.take_along_axis(pop, states, axis=0)
+
+
+def sort_states(states, pops, nlargest):
+    """Helper function to sort states by decreasing population, and by\
+    index for equal population.
+
+    Args:
+        states (numpy array, integer): The indices of the states.
+        pops (numpy array, real): The population of the states.
+        nlargest (integer): The number of states to be kept.
+
+    Returns:
+        numpy array, integer; numpy array, real: The sorted indices of the\
+        states and their population."""
+    order = np.lexsort((states, -pops), axis=0)[:nlargest]
+    return (np.take_along_axis(states, order, axis=0),
+            np.take_along_axis(pops, order, axis=0))
+
+
+def check_norm(time, norm, tol=1.E-6):
+    """Function to check if the norm of the wave function is conserved.
+
+    Args:
+        time (numpy array): The time data.
+        norm (numpy array): The norm of the wave function over time.
+        tol (float): The largest deviation of the norm from 1 that is\
+        tolerated.
+
+    Returns:
+        bool: True if the norm is conserved within the tolerance."""
+    drift = np.abs(norm - 1.0)
+    if np.any(drift > tol):
+        print('Warning: Norm deviates from 1 by more than {}'.format(tol))
+        print('First deviation at time {}, largest deviation {}'.format(
+              time[np.argmax(drift > tol)], np.max(drift)))
+        return False
+    return True
+
+
+def overlap(wavef):
+    """Helper function to compute the overlap between the first vector and\
+    all others.
+
+    Args:
+        wavef (numpy array, complex): The wave function over time.
+
+    Returns:
+        numpy array, complex: The overlap over time."""
+    return np.dot(np.conjugate(wavef[:, 0]), wavef)
+
+
+def calc_auto(wavef, nworkers=1, blocksize=1024):
     """Helper function to compute the vector overlap.
 
     Args:
         wavef (numpy array, complex): The wave function over time.
+        nworkers (integer): The number of threads.
+        blocksize (integer): The number of coefficients processed at once.
 
     Returns:
         numpy array, complex: The autocorrelation function over time."""
-    aucofu = np.zeros(len(wavef[0]), dtype=complex)
     if type(wavef.item(0)) != complex:
         print('Found ', type(wavef.item(0)))
         raise TypeError('calc auto received wrong type of wavefunction data!')
-    for i in range(0, len(wavef[0])):
-        aucofu[i] = np.sum(np.conjugate(wavef[:, 0]) * wavef[:, i])
-    return aucofu
+
+    def myblock(start, stop):
+        return overlap(wavef[start:stop])
+
+    return reduce_blocks(myblock, len(wavef), nworkers, blocksize)
 
 
 def DFT(wavef, realdft=True):
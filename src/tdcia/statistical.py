@@ -1,7 +1,23 @@
 import numpy as np
 
 
-def check_significance(data, threshd):
+def variance(data):
+    """Calculates the variance of each column for numpy arrays and pandas\
+    dataframes.
+
+    Args:
+        data (numpy array/pandas dataframe): The data object.
+
+    Returns:
+        numpy array/pandas series: The variance of each column."""
+    if type(data) == np.ndarray:
+        myvar = np.var(data, axis=1)
+    else:
+        myvar = data.var()
+    return myvar
+
+
+def check_significance(data, threshd, myvar=None):
     """Checks which columns are significant based on the set threshold
     for numpy arrays and pandas dataframes. Deletes insignificant
     columns.
@@ -10,6 +26,8 @@ def check_significance(data, threshd):
         data (numpy array/pandas dataframe): The data object.
         threshd (float): The variance threshold below which data is considered as\
         constant and not included in the output.
+        myvar (numpy array/pandas series): The variance of each column, if\
+        already known.
 
     Returns:
         numpy array/pandas dataframe, integer list/string list:\
@@ -17,15 +35,16 @@ def check_significance(data, threshd):
         columns and the indices that correspond to the original columns that\
         remain, for plotting/labeling purposes.\
     purposes."""
+    if myvar is None:
+        myvar = variance(data)
     # find out type of data object
     if type(data) == np.ndarray:
         # determine which columns are important through the variance
-        myvar = np.var(data, axis=1)
         indices = np.nonzero(myvar > threshd)
         data = data[indices]
     else:
-        indices = data.var()[data.var() > threshd].index.values
-        data = data.drop(data.var()[data.var() < threshd].index.values, axis=1)
+        indices = myvar[myvar > threshd].index.values
+        data = data.drop(myvar[myvar < threshd].index.values, axis=1)
     return data, indices
 
 
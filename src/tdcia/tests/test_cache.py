@@ -0,0 +1,100 @@
+import os
+import pytest
+import numpy as np
+import cache as ca
+
+
+class count_calls:
+    def __init__(self):
+        self.ncalls = 0
+
+    def square(self, data):
+        self.ncalls += 1
+        return data**2
+
+    def square_list(self, data):
+        return list(self.square(data))
+
+
+@pytest.fixture()
+def get_counter():
+    return count_calls()
+
+
+def test_hash_file(tmp_path):
+    myfile = tmp_path / 'test.t'
+    myfile.write_text('time  x\n 0.0  1.0\n')
+    myhash = ca.hash_file(str(myfile))
+    assert myhash == ca.hash_file(str(myfile))
+    myfile.write_text('time  x\n 0.0  2.0\n')
+    assert myhash != ca.hash_file(str(myfile))
+
+
+def test_call(tmp_path, get_counter):
+    cache = ca.result_cache(str(tmp_path))
+    data = np.arange(3.0)
+    res = cache.call(get_counter.square, ('a', 1), data)
+    res2 = cache.call(get_counter.square, ('a', 1), data)
+    assert np.array_equal(res, res2)
+    assert get_counter.ncalls == 1
+    # a different key computes the result again
+    cache.call(get_counter.square, ('a', 2), data)
+    assert get_counter.ncalls == 2
+
+
+def test_cache_version(tmp_path, get_counter, monkeypatch):
+    cache = ca.result_cache(str(tmp_path))
+    cache.call(get_counter.square, (), np.arange(3.0))
+    monkeypatch.setattr(ca, 'cache_version', ca.cache_version + 1)
+    cache.call(get_counter.square, (), np.arange(3.0))
+    assert get_counter.ncalls == 2
+
+
+def test_call_no_cache(get_counter):
+    cache = ca.result_cache()
+    cache.call(get_counter.square, (), np.arange(3.0))
+    cache.call(get_counter.square, (), np.arange(3.0))
+    assert get_counter.ncalls == 2
+
+
+def test_evict(tmp_path, get_counter):
+    cache = ca.result_cache(str(tmp_path), maxsize=1500)
+    for i in range(3):
+        cache.call(get_counter.square, (i,), np.arange(100.0))
+    # only the most recent result fits into the cache
+    assert len(list(tmp_path.glob('*.pkl'))) == 1
+    cache.call(get_counter.square, (2,), np.arange(100.0))
+    assert get_counter.ncalls == 3
+
+
+def test_evict_order(tmp_path, get_counter):
+    cache = ca.result_cache(str(tmp_path), maxsize=2000)
+    paths = []
+    for i in range(2):
+        cache.call(get_counter.square, (i,), np.arange(100.0))
+        paths.append(cache.get_path(get_counter.square, (i,)))
+    # the order of use does not depend on the file timestamps
+    os.utime(paths[0], (2.E9, 2.E9))
+    os.utime(paths[1], (0, 0))
+    cache.call(get_counter.square, (2,), np.arange(100.0))
+    assert not os.path.isfile(paths[0])
+    cache.call(get_counter.square, (1,), np.arange(100.0))
+    assert get_counter.ncalls == 3
+
+
+def test_evict_leftover(tmp_path, get_counter):
+    (tmp_path / 'leftover.pkl.tmp').write_bytes(b'0' * 100)
+    cache = ca.result_cache(str(tmp_path))
+    cache.call(get_counter.square, (), np.arange(3.0))
+    assert not (tmp_path / 'leftover.pkl.tmp').exists()
+
+
+def test_too_large(tmp_path, get_counter):
+    cache = ca.result_cache(str(tmp_path), maxsize=100)
+    cache.call(get_counter.square, (), np.arange(100.0))
+    assert len(list(tmp_path.glob('*.pkl*'))) == 0
+    cache.call(get_counter.square, (), np.arange(100.0))
+    assert get_counter.ncalls == 2
+    # results without nbytes are checked after writing
+    cache.call(get_counter.square_list, (), np.arange(100.0))
+    assert len(list(tmp_path.glob('*.pkl*'))) == 0
@@ -95,3 +95,96 @@ def test_DFT_real(struc):
 def test_DFT_comp(struc):
     data_w, data_s = nl.DFT(struc[0], False)
     assert np.array_equal(data_s, struc[1])
+
+
+# test removal of restart rows and resampling
+def test_drop_restart_rows():
+    time = np.array([0.0, 0.1, 0.2, 0.3, 0.2, 0.3, 0.4])
+    data = np.stack((time, np.arange(7.0)))
+    data = nl.drop_restart_rows(data)
+    assert np.allclose(data[0], [0.0, 0.1, 0.2, 0.3, 0.4])
+    assert np.array_equal(data[1], [0.0, 1.0, 4.0, 5.0, 6.0])
+
+
+def test_prepare_time_grid():
+    time = np.array([0.0, 0.1, 0.2, 0.4, 0.5])
+    data = np.stack((time, 2.0 * time + 1j * time))
+    assert nl.check_time_grid(data[0]) is False
+    data = nl.prepare_time_grid(data)
+    assert nl.check_time_grid(np.real(data[0]))
+    assert np.allclose(data[0], [0.0, 0.1, 0.2, 0.3, 0.4, 0.5])
+    assert np.allclose(data[1], 2.0 * data[0] + 1j * data[0])
+    # uniform data is passed through unchanged
+    uniform = np.stack((np.arange(5) * 0.1, np.ones(5)))
+    assert nl.prepare_time_grid(uniform) is uniform
+
+
+# test that the blocked autocorrelation does not depend on the threads
+def test_aucofu_nworkers():
+    rng = np.random.default_rng(42)
+    wavef = rng.standard_normal((41, 20))
+    time, aucofu = nl.aucofu(wavef, nworkers=1, blocksize=3)
+    wavefc = wavef[1::2] + 1j * wavef[2::2]
+    assert np.allclose(aucofu, np.conjugate(wavefc[:, 0]) @ wavefc)
+    for nworkers in [2, 4]:
+        time, aucofu_n = nl.aucofu(wavef, nworkers=nworkers, blocksize=3)
+        assert np.array_equal(aucofu, aucofu_n)
+        assert np.array_equal(nl.calc_auto(wavefc, nworkers, blocksize=3),
+                              nl.calc_auto(wavefc, 1, blocksize=3))
+
+    # no coefficients
+    time, aucofu = nl.aucofu(wavef[:1])
+    assert np.array_equal(aucofu, np.zeros(20, dtype=complex))
+
+
+# test norm and largest populations from the same pass
+def test_aucofu_norm():
+    rng = np.random.default_rng(7)
+    wavef = rng.standard_normal((21, 5))
+    time, aucofu, norm, states, pops = nl.aucofu_norm(wavef, blocksize=3,
+                                                      nlargest=2)
+    assert np.array_equal(aucofu, nl.aucofu(wavef, blocksize=3)[1])
+    wavefc = wavef[1::2] + 1j * wavef[2::2]
+    pop = np.abs(wavefc)**2
+    assert np.allclose(norm, np.sum(pop, axis=0))
+    ref = np.argsort(-pop, axis=0, kind='stable')[:2]
+    assert np.array_equal(states, ref + 1)
+    assert np.allclose(pops, np.take_along_axis(pop, ref, axis=0))
+    result = nl.aucofu_norm(wavef, nworkers=3, blocksize=3, nlargest=2)
+    for res, res_n in zip((time, aucofu, norm, states, pops), result):
+        assert np.array_equal(res, res_n)
+
+
+def test_aucofu_norm_ties():
+    # only the first state is populated, all others have equal population
+    wavef = np.zeros((1 + 2 * 3000, 4))
+    wavef[1] = 1.0
+    for blocksize in [50, 1024]:
+        states, pops = nl.aucofu_norm(wavef, blocksize=blocksize)[3:]
+        assert np.array_equal(states, np.repeat([[1], [2], [3]], 4, axis=1))
+        assert np.array_equal(pops[0], np.ones(4))
+
+
+def test_check_norm():
+    time = np.arange(4) * 0.1
+    assert nl.check_norm(time, np.ones(4))
+    assert not nl.check_norm(time, np.array([1.0, 1.0, 1.0 + 1.E-4, 1.0]))
+
+
+def test_resample_no_extrapolation():
+    time = np.array([0.0, 0.1, 0.2, 0.35])
+    data = nl.resample(np.stack((time, time)))
+    assert np.allclose(data[0], [0.0, 0.1, 0.2, 0.3])
+    assert np.allclose(data[1], data[0])
+
+
+# the norm is conserved on the original time steps of non-uniform data
+def test_norm_before_resampling():
+    time = np.array([0.0, 0.1, 0.2, 0.3, 0.45, 0.5, 0.6])
+    wavefc = np.exp(-5j * time)
+    wavef = np.stack((time, wavefc.real, wavefc.imag))
+    time, aucofu, norm, states, pops = nl.aucofu_norm(wavef)
+    assert nl.check_norm(time, norm)
+    time, aucofu = nl.prepare_time_grid(np.stack((time, aucofu)))
+    resampled = nl.aucofu(nl.prepare_time_grid(wavef))
+    assert np.allclose(aucofu, resampled[1])